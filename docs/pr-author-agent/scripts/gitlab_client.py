@@ -5,16 +5,119 @@ Handles branch creation, file commits, and Merge Request creation via GitLab API
 """
 
 import base64
+import functools
+import importlib.util
 import os
+import posixpath
+import random
+import re
+import threading
 import time
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
 from typing import Any
-from urllib.parse import quote, urlparse
+from urllib.parse import quote, unquote, urlparse
 
 import httpx
 
+try:
+    import orjson
+except ImportError:  # Optional: faster JSON encoding and decoding
+    orjson = None
+
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Process-wide clients from GitLabClient.shared(), keyed by API URL and credentials
+_SHARED_CLIENTS: dict[tuple[str | None, ...], "GitLabClient"] = {}
+_SHARED_LOCK = threading.Lock()
+
+# Statuses worth retrying; other client errors fail immediately
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Upper bound for any single retry or rate-limit wait, in seconds
+MAX_RETRY_WAIT = 60
+
+# CODEOWNERS rules: a path pattern followed by its owners (comments skipped)
+_CODEOWNERS_RULE = re.compile(r"^[ \t]*[^#\s]\S*[ \t]+(.+)$", re.MULTILINE)
+_CODEOWNERS_OWNER = re.compile(r"(?<!\S)@+(\S+)")
+
+# Reviewer user IDs keyed by (api_url, username); user IDs never change
+_USER_IDS: dict[tuple[str, str], int] = {}
+
+# Checked in order; the first one present wins
+CODEOWNERS_PATHS = ("CODEOWNERS", ".gitlab/CODEOWNERS", "docs/CODEOWNERS")
+
+# Fetches every CODEOWNERS candidate from the default branch in one round trip
+CODEOWNERS_QUERY = """
+query($fullPath: ID!, $paths: [String!]!) {
+  project(fullPath: $fullPath) {
+    repository {
+      blobs(paths: $paths) {
+        nodes { path rawTextBlob }
+      }
+    }
+  }
+}
+"""
+
+USERS_QUERY = """
+query($usernames: [String!]) {
+  users(usernames: $usernames) {
+    nodes { id username }
+  }
+}
+"""
+
+
+@functools.lru_cache(maxsize=256)
+def parse_project_path(repo_url: str) -> str:
+    """Parse project path from URL and return URL-encoded project ID."""
+    parsed = urlparse(repo_url)
+    path = parsed.path.strip("/").replace(".git", "")
+    # GitLab uses URL-encoded project path as ID
+    return quote(path, safe="")
+
+
+class GraphQLError(RuntimeError):
+    """The GraphQL API returned errors for a query."""
+
+
+def parse_retry_after(headers: httpx.Headers) -> float | None:
+    """Parse Retry-After (seconds or HTTP date) into seconds."""
+    retry_after = headers.get("Retry-After")
+    if not retry_after:
+        return None
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_codeowners(content: str) -> list[str]:
+    """Extract unique owners from CODEOWNERS content, in file order."""
+    owners = dict.fromkeys(
+        owner
+        for rule in _CODEOWNERS_RULE.findall(content)
+        for owner in _CODEOWNERS_OWNER.findall(rule)
+    )
+    return list(owners)
+
+
+def decode_json(response: httpx.Response) -> Any:
+    """Decode a JSON response body, straight from bytes with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
 
-@dataclass
+
+@dataclass(slots=True)
 class GitLabConfig:
     """Configuration for GitLab API access."""
     access_token: str | None = None
@@ -22,6 +125,7 @@ class GitLabConfig:
     timeout: int = 30
     max_retries: int = 3
     retry_delay: float = 2.0
+    max_concurrency: int = 16
 
     def __post_init__(self):
         # Try to load from environment if not provided
@@ -46,10 +150,54 @@ class GitLabClient:
     - Merge Request creation with labels and reviewers
     """
 
+    # Commits API can create the branch and commit in a single request
+    supports_atomic_branch_commit = True
+
+    __slots__ = (
+        "config",
+        "_client",
+        "_projects",
+        "_codeowners",
+        "_rate_reset",
+        "_closed",
+    )
+
+    @classmethod
+    def shared(cls, config: GitLabConfig = None) -> "GitLabClient":
+        """
+        Return the process-wide client for these credentials.
+
+        Reusing one client keeps its connection pool and TLS sessions warm
+        across repositories. A shared client that was closed is replaced.
+        """
+        config = config or GitLabConfig()
+        key = (config.api_url, config.access_token)
+        with _SHARED_LOCK:
+            client = _SHARED_CLIENTS.get(key)
+            if client is None or client._closed.is_set():
+                client = _SHARED_CLIENTS[key] = cls(config)
+            return client
+
     def __init__(self, config: GitLabConfig = None):
         self.config = config or GitLabConfig()
+        self._projects: dict[str, dict[str, Any]] = {}
+        self._codeowners: dict[str, list[str]] = {}
+        # Epoch time the rate limit resets once it is nearly spent
+        self._rate_reset: float = 0
+        # Set by close() to cut short any retry wait in progress
+        self._closed = threading.Event()
+        # One pooled client for all calls; the transport re-dials failed connects
         self._client = httpx.Client(
-            timeout=self.config.timeout,
+            transport=httpx.HTTPTransport(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_keepalive_connections=32,
+                    max_connections=64,
+                    keepalive_expiry=90
+                ),
+                retries=self.config.max_retries
+            ),
+            timeout=httpx.Timeout(self.config.timeout, connect=5, pool=5),
             headers=self._build_headers()
         )
 
@@ -63,17 +211,21 @@ class GitLabClient:
         return headers
 
     def _parse_repo_url(self, repo_url: str) -> str:
-        """Parse project path from URL and return URL-encoded project ID."""
-        parsed = urlparse(repo_url)
-        path = parsed.path.strip("/").replace(".git", "")
-        # GitLab uses URL-encoded project path as ID
-        return quote(path, safe="")
+        """Parse URL-encoded project ID from URL (memoized across clients)."""
+        return parse_project_path(repo_url)
+
+    def _get_project(self, repo_url: str) -> dict[str, Any]:
+        """Get project metadata, cached for the lifetime of the client."""
+        project_path = self._parse_repo_url(repo_url)
+        project = self._projects.get(project_path)
+        if project is None:
+            response = self._request("GET", f"/projects/{project_path}")
+            project = self._projects[project_path] = decode_json(response)
+        return project
 
     def _get_project_id(self, repo_url: str) -> int:
         """Get the numeric project ID from URL."""
-        project_path = self._parse_repo_url(repo_url)
-        response = self._request("GET", f"/projects/{project_path}")
-        return response.json()["id"]
+        return self._get_project(repo_url)["id"]
 
     def _request(
         self,
@@ -82,37 +234,134 @@ class GitLabClient:
         **kwargs
     ) -> httpx.Response:
         """Make an API request with retry logic."""
-        url = f"{self.config.api_url}{endpoint}"
+        url = endpoint if "://" in endpoint else f"{self.config.api_url}{endpoint}"
+
+        # Commit payloads carry whole files; orjson encodes them much faster
+        if orjson is not None and "json" in kwargs:
+            kwargs["content"] = orjson.dumps(kwargs.pop("json"))
+            kwargs["headers"] = {
+                **kwargs.get("headers", {}),
+                "Content-Type": "application/json"
+            }
 
+        last_attempt = self.config.max_retries - 1
         for attempt in range(self.config.max_retries):
+            # Budget nearly spent: wait for the reset rather than hit a 429
+            wait_time = self._rate_reset - time.time()
+            if wait_time > 0:
+                print(f"Rate limit nearly exhausted, waiting {wait_time:.0f}s...")
+                self._sleep(min(wait_time, MAX_RETRY_WAIT))
+
             try:
                 response = self._client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                # The transport already re-dials failed connects. Other errors
+                # can arrive after the server acted, so only retry idempotent GETs.
+                if (
+                    attempt == last_attempt
+                    or method.upper() != "GET"
+                    or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                ):
+                    raise
+                delay = self._backoff(attempt)
+                print(f"Request failed ({type(e).__name__}), retrying in {delay:.1f}s...")
+                self._sleep(delay)
+                continue
 
-                # Handle rate limiting
-                if response.status_code == 429:
-                    retry_after = int(response.headers.get("Retry-After", 60))
-                    print(f"Rate limited, waiting {retry_after}s...")
-                    time.sleep(min(retry_after, 60))
-                    continue
-
-                response.raise_for_status()
+            if response.is_success:
+                self._track_rate_limit(response)
                 return response
 
-            except httpx.HTTPStatusError as e:
-                if attempt < self.config.max_retries - 1:
-                    delay = self.config.retry_delay * (2 ** attempt)
-                    print(f"Request failed ({e.response.status_code}), retrying in {delay}s...")
-                    time.sleep(delay)
-                else:
-                    raise
+            if response.status_code not in RETRYABLE_STATUSES or attempt == last_attempt:
+                response.raise_for_status()
+            wait_time = parse_retry_after(response.headers)
+            if wait_time is None:
+                wait_time = self._backoff(attempt)
+            print(f"Request failed ({response.status_code}), retrying in {wait_time:.1f}s...")
+            self._sleep(min(wait_time, MAX_RETRY_WAIT))
 
         raise RuntimeError("Max retries exceeded")
 
+    def _sleep(self, seconds: float) -> None:
+        """Wait before retrying; blocks only the calling worker and ends on close()."""
+        if self._closed.wait(seconds):
+            raise RuntimeError("Client closed while waiting to retry")
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff so parallel agents don't retry in lockstep."""
+        return random.uniform(
+            0, min(MAX_RETRY_WAIT, self.config.retry_delay * (2 ** attempt))
+        )
+
+    def _track_rate_limit(self, response: httpx.Response) -> None:
+        """Remember the reset time when the rate limit is nearly spent."""
+        try:
+            remaining = int(response.headers["RateLimit-Remaining"])
+            reset = float(response.headers["RateLimit-Reset"])
+        except (KeyError, ValueError):
+            # Missing or malformed headers: nothing to track
+            self._rate_reset = 0
+            return
+        self._rate_reset = reset if remaining <= 1 else 0
+
+    def _graphql(self, query: str, variables: dict[str, Any]) -> dict[str, Any]:
+        """Run a GraphQL query and return its data."""
+        graphql_url = self.config.api_url.rsplit("/v4", 1)[0] + "/graphql"
+        response = self._request(
+            "POST",
+            graphql_url,
+            json={"query": query, "variables": variables}
+        )
+        result = decode_json(response)
+        if result.get("errors"):
+            raise GraphQLError(f"GraphQL error: {result['errors']}")
+        return result["data"]
+
+    def _lookup_user_id(self, username: str) -> int | None:
+        """Look up a single user ID via the REST users endpoint."""
+        try:
+            response = self._request("GET", "/users", params={"username": username})
+        except httpx.HTTPStatusError:
+            return None
+        users = decode_json(response)
+        return users[0]["id"] if users else None
+
+    def _resolve_user_ids(self, usernames: list[str]) -> list[int]:
+        """
+        Resolve usernames to user IDs, skipping unknown users.
+
+        Uncached usernames are resolved with one GraphQL query; instances
+        without GraphQL fall back to concurrent REST lookups.
+        """
+        api_url = self.config.api_url
+        missing = [
+            username for username in dict.fromkeys(usernames)
+            if (api_url, username.lower()) not in _USER_IDS
+        ]
+
+        if missing:
+            try:
+                data = self._graphql(USERS_QUERY, {"usernames": missing})
+                for user in data["users"]["nodes"]:
+                    # Global IDs look like gid://gitlab/User/123
+                    user_id = int(user["id"].rsplit("/", 1)[-1])
+                    _USER_IDS[(api_url, user["username"].lower())] = user_id
+            except (httpx.HTTPStatusError, GraphQLError):
+                with ThreadPoolExecutor(max_workers=self.config.max_concurrency) as executor:
+                    user_ids = executor.map(self._lookup_user_id, missing)
+                    for username, user_id in zip(missing, user_ids):
+                        if user_id is not None:
+                            _USER_IDS[(api_url, username.lower())] = user_id
+
+        return [
+            _USER_IDS[(api_url, username.lower())]
+            for username in dict.fromkeys(usernames)
+            if (api_url, username.lower()) in _USER_IDS
+        ]
+
     def get_default_branch(self, repo_url: str) -> str:
         """Get the default branch name for a project."""
-        project_path = self._parse_repo_url(repo_url)
-        response = self._request("GET", f"/projects/{project_path}")
-        return response.json()["default_branch"]
+        return self._get_project(repo_url)["default_branch"]
 
     def get_branch_sha(self, repo_url: str, branch: str) -> str:
         """Get the SHA of a branch's HEAD commit."""
@@ -121,7 +370,7 @@ class GitLabClient:
             "GET",
             f"/projects/{project_path}/repository/branches/{quote(branch, safe='')}"
         )
-        return response.json()["commit"]["id"]
+        return decode_json(response)["commit"]["id"]
 
     def create_branch(
         self,
@@ -150,61 +399,96 @@ class GitLabClient:
                 "ref": base_branch
             }
         )
-        return response.json()
+        return decode_json(response)
 
     def commit_files(
         self,
         repo_url: str,
         branch_name: str,
-        files: dict[str, str],
-        message: str
+        files: Mapping[str, str] | Iterable[tuple[str, str]],
+        message: str,
+        base_branch: str | None = None
     ) -> dict[str, Any]:
         """
         Commit multiple files to a branch using Commits API.
 
         GitLab's commits API supports multiple file actions in a single request.
+        When base_branch is given, the target branch is created from it as part
+        of the same commit request.
 
         Args:
             repo_url: Repository URL
             branch_name: Target branch
-            files: Dictionary of file_path -> content
+            files: Dictionary of file_path -> content, or (file_path, content) pairs
             message: Commit message
+            base_branch: Branch to create branch_name from (default: branch must exist)
 
         Returns:
             Created commit object
         """
         project_path = self._parse_repo_url(repo_url)
+        ref = base_branch or branch_name
+        if isinstance(files, Mapping):
+            files = files.items()
+        files = list(files)
+
+        # List each parent directory once to decide create vs update
+        directories = {posixpath.dirname(file_path) for file_path, _ in files}
+        with ThreadPoolExecutor(max_workers=self.config.max_concurrency) as executor:
+            listings = executor.map(
+                lambda directory: self._list_files(project_path, directory, ref),
+                directories
+            )
+            existing_paths = set().union(*listings)
 
         # Build actions array for multi-file commit
-        actions = []
-        for file_path, content in files.items():
-            # Check if file exists to determine create vs update
-            try:
-                self._request(
-                    "GET",
-                    f"/projects/{project_path}/repository/files/{quote(file_path, safe='')}",
-                    params={"ref": branch_name}
-                )
-                action = "update"
-            except httpx.HTTPStatusError:
-                action = "create"
-
-            actions.append({
-                "action": action,
+        actions = [
+            {
+                "action": "update" if file_path in existing_paths else "create",
                 "file_path": file_path,
                 "content": content
-            })
+            }
+            for file_path, content in files
+        ]
+
+        commit_data = {
+            "branch": branch_name,
+            "commit_message": message,
+            "actions": actions
+        }
+        if base_branch:
+            commit_data["start_branch"] = base_branch
 
         response = self._request(
             "POST",
             f"/projects/{project_path}/repository/commits",
-            json={
-                "branch": branch_name,
-                "commit_message": message,
-                "actions": actions
-            }
+            json=commit_data
         )
-        return response.json()
+        return decode_json(response)
+
+    def _list_files(self, project_path: str, directory: str, ref: str) -> set[str]:
+        """List the file paths directly under a directory at the given ref."""
+        params = {"ref": ref, "per_page": 100}
+        if directory:
+            params["path"] = directory
+
+        paths = set()
+        page = "1"
+        while page:
+            try:
+                response = self._request(
+                    "GET",
+                    f"/projects/{project_path}/repository/tree",
+                    params={**params, "page": page}
+                )
+            except httpx.HTTPStatusError:
+                break  # Directory does not exist at this ref
+            paths.update(
+                item["path"] for item in decode_json(response) if item["type"] == "blob"
+            )
+            page = response.headers.get("X-Next-Page")
+
+        return paths
 
     def create_pull_request(
         self,
@@ -236,20 +520,7 @@ class GitLabClient:
         project_path = self._parse_repo_url(repo_url)
 
         # Resolve reviewer usernames to IDs if provided
-        reviewer_ids = []
-        if reviewers:
-            for username in reviewers:
-                try:
-                    user_response = self._request(
-                        "GET",
-                        f"/users",
-                        params={"username": username}
-                    )
-                    users = user_response.json()
-                    if users:
-                        reviewer_ids.append(users[0]["id"])
-                except httpx.HTTPStatusError:
-                    pass
+        reviewer_ids = self._resolve_user_ids(reviewers) if reviewers else []
 
         # Create MR
         mr_data = {
@@ -271,7 +542,7 @@ class GitLabClient:
             f"/projects/{project_path}/merge_requests",
             json=mr_data
         )
-        mr_json = mr_response.json()
+        mr_json = decode_json(mr_response)
 
         return {
             "number": mr_json["iid"],
@@ -283,39 +554,53 @@ class GitLabClient:
 
     def get_codeowners(self, repo_url: str) -> list[str]:
         """Get reviewers from CODEOWNERS file."""
-        project_path = self._parse_repo_url(repo_url)
-
-        # Try common CODEOWNERS locations
-        codeowners_paths = [
-            "CODEOWNERS",
-            ".gitlab/CODEOWNERS",
-            "docs/CODEOWNERS"
-        ]
+        # CODEOWNERS rarely changes within a run; also skips re-probing misses
+        if repo_url in self._codeowners:
+            return list(self._codeowners[repo_url])
+
+        try:
+            content = self._fetch_codeowners_graphql(repo_url)
+        except (httpx.HTTPStatusError, GraphQLError):
+            content = self._fetch_codeowners_rest(repo_url)
+
+        owners = parse_codeowners(content) if content else []
+        self._codeowners[repo_url] = owners
+        return list(owners)
+
+    def _fetch_codeowners_graphql(self, repo_url: str) -> str | None:
+        """Fetch the first CODEOWNERS file present with a single GraphQL query."""
+        full_path = unquote(self._parse_repo_url(repo_url))
+        data = self._graphql(
+            CODEOWNERS_QUERY,
+            {"fullPath": full_path, "paths": list(CODEOWNERS_PATHS)}
+        )
+        if not data["project"]:
+            return None
+        blobs = {
+            blob["path"]: blob["rawTextBlob"]
+            for blob in data["project"]["repository"]["blobs"]["nodes"]
+        }
+        for path in CODEOWNERS_PATHS:
+            if blobs.get(path) is not None:
+                return blobs[path]
+        return None
 
-        for path in codeowners_paths:
+    def _fetch_codeowners_rest(self, repo_url: str) -> str | None:
+        """Probe each CODEOWNERS location over REST until one exists."""
+        project_path = self._parse_repo_url(repo_url)
+        ref = self.get_default_branch(repo_url)
+        for path in CODEOWNERS_PATHS:
             try:
                 response = self._request(
                     "GET",
                     f"/projects/{project_path}/repository/files/{quote(path, safe='')}/raw",
-                    params={"ref": "main"}
+                    params={"ref": ref}
                 )
-                content = response.text
-
-                # Parse CODEOWNERS (simplified)
-                owners = []
-                for line in content.split("\n"):
-                    line = line.strip()
-                    if line and not line.startswith("#"):
-                        parts = line.split()
-                        for part in parts[1:]:  # Skip path pattern
-                            if part.startswith("@"):
-                                owners.append(part.lstrip("@"))
-                return owners
+                return response.text
 
             except httpx.HTTPStatusError:
                 continue
-
-        return []
+        return None
 
     def add_comment(
         self,
@@ -330,7 +615,7 @@ class GitLabClient:
             f"/projects/{project_path}/merge_requests/{mr_iid}/notes",
             json={"body": body}
         )
-        return response.json()
+        return decode_json(response)
 
     def get_pipeline_status(
         self,
@@ -343,13 +628,14 @@ class GitLabClient:
             "GET",
             f"/projects/{project_path}/merge_requests/{mr_iid}/pipelines"
         )
-        pipelines = response.json()
+        pipelines = decode_json(response)
         if pipelines:
             return pipelines[0]  # Return most recent pipeline
         return {"status": "unknown"}
 
     def close(self):
-        """Close the HTTP client."""
+        """Close the HTTP client, waking any request waiting to retry."""
+        self._closed.set()
         self._client.close()
 
     def __enter__(self):
@@ -5,13 +5,82 @@ Renders code templates with variable substitution for observability instrumentat
 """
 
 import argparse
+import functools
 import json
+import operator
+import os
 import re
-from dataclasses import dataclass, asdict
+from collections.abc import Iterator
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
 
+# ${VAR_NAME} references; shared by every engine instance
+_VARIABLE_PATTERN = re.compile(r'\$\{(\w+)\}')
+
+
+@functools.lru_cache(maxsize=256)
+def compile_template(template: str) -> str:
+    """
+    Convert a ${VAR} template into an equivalent str.format_map() template.
+
+    Literal braces are escaped and each ${VAR} becomes {VAR}, so substitution
+    runs in C. Templates are immutable, so each one is converted only once.
+    """
+    parts = _VARIABLE_PATTERN.split(template)
+    for i, part in enumerate(parts):
+        if i % 2 == 0:
+            parts[i] = part.replace("{", "{{").replace("}", "}}")
+        elif part.isdigit():
+            # All-digit names would be positional fields; keep them literal
+            parts[i] = "${{" + part + "}}"
+        else:
+            parts[i] = "{" + part + "}"
+    return "".join(parts)
+
+
+class _SafeDict(dict):
+    """Variable lookup that leaves unknown ${VAR} references untouched."""
+
+    def __missing__(self, key: str) -> str:
+        return f"${{{key}}}"
+
+
+# Output file kind by extension, used to pick the output directory
+OUTPUT_KINDS = {
+    "java": "source",
+    "py": "source",
+    "go": "source",
+    "yaml": "config",
+    "yml": "config",
+}
+
+
+# Template variables copied verbatim from TemplateContext attributes
+CONTEXT_VARIABLES = {
+    "SERVICE_NAME": "service_name",
+    "SERVICE_URN": "service_urn",
+    "NAMESPACE": "namespace",
+    "INPUT_TOPIC": "input_topic",
+    "OUTPUT_TOPIC": "output_topic",
+    "OWNER_TEAM": "owner_team",
+    "CONSUMER_GROUP": "consumer_group",
+    "SCHEMA_ID": "schema_id",
+    "OTEL_VERSION": "otel_version",
+    "TIMESTAMP": "timestamp",
+    "DIFF_PLAN_ID": "diff_plan_id",
+    "LANGUAGE": "language",
+    # Package name derivations
+    "PACKAGE_NAME": "package_name",
+    "CLASS_NAME": "class_name",
+    "MODULE_NAME": "module_name",
+}
+
+# Reads all of the attributes above in one C-level call
+_get_context_values = operator.attrgetter(*CONTEXT_VARIABLES.values())
+
+
 @dataclass
 class TemplateContext:
     """Context for template variable interpolation."""
@@ -29,40 +98,55 @@ class TemplateContext:
     confidence: float = 0.0
     archetypes: list[str] = None
     language: str = "java"
+    # Derived from service_name once, in __post_init__
+    package_name: str = field(init=False, repr=False)
+    class_name: str = field(init=False, repr=False)
+    module_name: str = field(init=False, repr=False)
+    source_dir: str = field(init=False, repr=False)
+    # Built by the first to_dict() call
+    _variables: dict[str, Any] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def __post_init__(self):
         if self.archetypes is None:
             self.archetypes = []
         if not self.consumer_group:
             self.consumer_group = f"{self.service_name}-cg"
-
-    def to_dict(self) -> dict[str, Any]:
-        """Convert context to dictionary for variable lookup."""
-        d = asdict(self)
-        # Add computed variables
-        d["SERVICE_NAME"] = self.service_name
-        d["SERVICE_URN"] = self.service_urn
-        d["NAMESPACE"] = self.namespace
-        d["INPUT_TOPIC"] = self.input_topic
-        d["OUTPUT_TOPIC"] = self.output_topic
-        d["OWNER_TEAM"] = self.owner_team
-        d["CONSUMER_GROUP"] = self.consumer_group
-        d["SCHEMA_ID"] = self.schema_id
-        d["OTEL_VERSION"] = self.otel_version
-        d["TIMESTAMP"] = self.timestamp
-        d["DIFF_PLAN_ID"] = self.diff_plan_id
-        d["CONFIDENCE"] = f"{self.confidence:.0%}"
-        d["ARCHETYPES"] = ", ".join(self.archetypes)
-        d["LANGUAGE"] = self.language
-
-        # Package name derivations
-        d["PACKAGE_NAME"] = self.service_name.replace("-", ".")
-        d["CLASS_NAME"] = "".join(
+        self.package_name = self.service_name.replace("-", ".")
+        self.class_name = "".join(
             word.capitalize() for word in self.service_name.split("-")
         )
-        d["MODULE_NAME"] = self.service_name.replace("-", "_")
+        self.module_name = self.service_name.replace("-", "_")
+
+        # Language-specific source directory for generated code
+        if self.language == "java":
+            self.source_dir = f"src/main/java/com/company/{self.service_name.replace('-', '/')}"
+        elif self.language == "python":
+            self.source_dir = f"src/{self.module_name}"
+        elif self.language == "go":
+            self.source_dir = "internal/observability"
+        else:
+            self.source_dir = "src"
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Convert context to dictionary for variable lookup.
+
+        The dictionary is built once and shared by later calls, so treat it
+        as read-only and don't modify the context after rendering starts.
+        """
+        if self._variables is None:
+            self._variables = self._build_variables()
+        return self._variables
 
-        return d
+    def _build_variables(self) -> dict[str, Any]:
+        """Build the template variable dictionary."""
+        # Templates only reference the UPPERCASE names; all values are strings
+        variables = dict(zip(CONTEXT_VARIABLES, _get_context_values(self)))
+        variables["CONFIDENCE"] = f"{self.confidence:.0%}"
+        variables["ARCHETYPES"] = ", ".join(self.archetypes)
+        return variables
 
 
 class TemplateEngine:
@@ -78,13 +162,15 @@ class TemplateEngine:
 
     def __init__(self, templates_path: str = "./references/templates"):
         self.templates_path = Path(templates_path)
-        self._template_cache: dict[str, str] = {}
-        self._variable_pattern = re.compile(r'\$\{(\w+)\}')
+        self._template_cache: dict[str, list[tuple[str, str]]] = {}
+        # Template directory name -> path, built on first by-name lookup
+        self._dir_index: dict[str, Path] | None = None
 
     def render_template(
         self,
         template_name: str,
-        context: TemplateContext
+        context: TemplateContext,
+        variables: dict[str, Any] | None = None
     ) -> dict[str, str]:
         """
         Render a template and return generated files.
@@ -92,55 +178,172 @@ class TemplateEngine:
         Args:
             template_name: Name of the template (e.g., 'kafka-consumer-otel-java')
             context: Template context with variables
+            variables: Pre-built context.to_dict() to reuse across renders
 
         Returns:
             Dictionary mapping file paths to rendered content
         """
-        template_dir = self._find_template_dir(template_name)
-        if not template_dir:
-            raise ValueError(f"Template not found: {template_name}")
+        return dict(self.iter_rendered(template_name, context, variables))
+
+    def iter_rendered(
+        self,
+        template_name: str,
+        context: TemplateContext,
+        variables: dict[str, Any] | None = None
+    ) -> Iterator[tuple[str, str]]:
+        """
+        Render a template one file at a time.
 
-        rendered_files = {}
-        variables = context.to_dict()
+        Lets callers write each file as soon as it is rendered instead of
+        holding the whole template set in memory.
 
-        for template_file in template_dir.glob("*.tmpl"):
+        Args:
+            template_name: Name of the template (e.g., 'kafka-consumer-otel-java')
+            context: Template context with variables
+            variables: Pre-built context.to_dict() to reuse across renders
+
+        Yields:
+            (file path, rendered content) pairs
+        """
+        if variables is None:
+            variables = context.to_dict()
+
+        for template_stem, template_content in self._load_template(template_name):
             # Determine output file name
-            output_name = template_file.stem  # Remove .tmpl
-            output_name = self._interpolate(output_name, variables)
+            output_name = self._interpolate(template_stem, variables)
 
-            # Read and render template
-            template_content = template_file.read_text()
+            # Render template
             rendered_content = self._interpolate(template_content, variables)
 
             # Determine output path
             output_path = self._get_output_path(template_name, output_name, context)
-            rendered_files[output_path] = rendered_content
+            yield output_path, rendered_content
 
-        return rendered_files
+    def render_template_batch(
+        self,
+        template_name: str,
+        contexts: list[TemplateContext]
+    ) -> list[dict[str, str]]:
+        """
+        Render one template for many contexts (e.g., a fleet of services).
+
+        Template files are loaded and compiled once up front, so each context
+        only pays for substitution.
 
-    def render_runbook(self, context: TemplateContext) -> str:
+        Args:
+            template_name: Name of the template (e.g., 'kafka-consumer-otel-java')
+            contexts: Template contexts to render, one per service
+
+        Returns:
+            One dictionary per context, mapping file paths to rendered content
+        """
+        compiled_files = [
+            (compile_template(template_stem), compile_template(template_content))
+            for template_stem, template_content in self._load_template(template_name)
+        ]
+
+        results = []
+        for context in contexts:
+            variables = context.to_dict()
+            rendered_files = {}
+            for compiled_stem, compiled_content in compiled_files:
+                output_name = self._format(compiled_stem, variables)
+                output_path = self._get_output_path(template_name, output_name, context)
+                rendered_files[output_path] = self._format(compiled_content, variables)
+            results.append(rendered_files)
+
+        return results
+
+    def render_runbook(
+        self,
+        context: TemplateContext,
+        variables: dict[str, Any] | None = None
+    ) -> str:
         """Generate a RUNBOOK.md from the standard template."""
-        template = self._get_builtin_template("runbook")
-        return self._interpolate(template, context.to_dict())
+        template = load_builtin_template("runbook")
+        return self._interpolate(template, variables or context.to_dict())
 
-    def render_lineage_spec(self, context: TemplateContext) -> str:
+    def render_lineage_spec(
+        self,
+        context: TemplateContext,
+        variables: dict[str, Any] | None = None
+    ) -> str:
         """Generate a lineage spec YAML from template."""
-        template = self._get_builtin_template("lineage-spec")
-        return self._interpolate(template, context.to_dict())
+        template = load_builtin_template("lineage-spec")
+        return self._interpolate(template, variables or context.to_dict())
 
-    def render_contract_stub(self, context: TemplateContext) -> str:
+    def render_contract_stub(
+        self,
+        context: TemplateContext,
+        variables: dict[str, Any] | None = None
+    ) -> str:
         """Generate a data contract YAML from template."""
-        template = self._get_builtin_template("contract-stub")
-        return self._interpolate(template, context.to_dict())
+        template = load_builtin_template("contract-stub")
+        return self._interpolate(template, variables or context.to_dict())
 
-    def render_telemetry_test(self, context: TemplateContext) -> str:
+    def render_telemetry_test(
+        self,
+        context: TemplateContext,
+        variables: dict[str, Any] | None = None
+    ) -> str:
         """Generate telemetry validation tests from template."""
-        template_key = f"telemetry-test-{context.language}"
-        template = self._get_builtin_template(template_key)
-        if not template:
-            # Fallback to generic test template
-            template = self._get_builtin_template("telemetry-test-java")
-        return self._interpolate(template, context.to_dict())
+        # Fallback to the Java test template for other languages
+        template = load_builtin_template(
+            TELEMETRY_TEST_TEMPLATES.get(context.language, "telemetry-test-java")
+        )
+        return self._interpolate(template, variables or context.to_dict())
+
+    def render_many(
+        self,
+        template_types: list[str],
+        context: TemplateContext,
+        variables: dict[str, Any] | None = None
+    ) -> dict[str, str]:
+        """
+        Render several built-in templates against the same context.
+
+        Args:
+            template_types: Built-in template types (e.g., 'runbook', 'lineage-spec')
+            context: Template context with variables
+            variables: Pre-built context.to_dict() to reuse across renders
+
+        Returns:
+            Dictionary mapping template type to rendered content
+        """
+        variables = variables or context.to_dict()
+        return {
+            template_type: self._interpolate(
+                self._get_builtin_template(template_type), variables
+            )
+            for template_type in template_types
+        }
+
+    def _load_template(self, template_name: str) -> list[tuple[str, str]]:
+        """
+        Load the template files for a template name.
+
+        Files are read from disk on first use and cached by template name,
+        so repeated renders only pay for interpolation.
+
+        Returns:
+            List of (file stem, template content) pairs
+        """
+        template_files = self._template_cache.get(template_name)
+        if template_files is None:
+            template_dir = self._find_template_dir(template_name)
+            if not template_dir:
+                raise ValueError(f"Template not found: {template_name}")
+
+            # scandir yields file types inline, saving a stat call per entry
+            template_files = []
+            with os.scandir(template_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".tmpl") and entry.is_file():
+                        with open(entry.path, encoding="utf-8") as f:
+                            template_files.append((entry.name[:-len(".tmpl")], f.read()))
+            self._template_cache[template_name] = template_files
+
+        return template_files
 
     def _find_template_dir(self, template_name: str) -> Path | None:
         """Find the template directory by name."""
@@ -154,11 +357,10 @@ class TemplateEngine:
                 return lang_path
 
         # Try direct match
-        for lang_dir in self.templates_path.iterdir():
-            if lang_dir.is_dir():
-                for template_dir in lang_dir.iterdir():
-                    if template_dir.is_dir() and template_dir.name == template_name:
-                        return template_dir
+        if self._dir_index is None:
+            self._dir_index = self._build_dir_index()
+        if template_name in self._dir_index:
+            return self._dir_index[template_name]
 
         # Try common templates
         common_path = self.templates_path / "common" / template_name
@@ -167,6 +369,17 @@ class TemplateEngine:
 
         return None
 
+    def _build_dir_index(self) -> dict[str, Path]:
+        """Index template directories by name across all language directories."""
+        index: dict[str, Path] = {}
+        for lang_dir in self.templates_path.iterdir():
+            if lang_dir.is_dir():
+                for template_dir in lang_dir.iterdir():
+                    if template_dir.is_dir():
+                        # Keep the first directory found for a name
+                        index.setdefault(template_dir.name, template_dir)
+        return index
+
     def _get_output_path(
         self,
         template_name: str,
@@ -174,363 +387,78 @@ class TemplateEngine:
         context: TemplateContext
     ) -> str:
         """Determine the output path for a generated file."""
-        lang = context.language
-
-        # Language-specific source directories
-        source_dirs = {
-            "java": f"src/main/java/com/company/{context.service_name.replace('-', '/')}",
-            "python": f"src/{context.service_name.replace('-', '_')}",
-            "go": "internal/observability"
-        }
+        _, dot, extension = output_name.rpartition(".")
+        kind = OUTPUT_KINDS.get(extension) if dot else None
 
-        # File extension mappings
-        if output_name.endswith((".java", ".py", ".go")):
-            return f"{source_dirs.get(lang, 'src')}/{output_name}"
-        elif output_name.endswith((".yaml", ".yml")):
+        if kind == "source":
+            return f"{context.source_dir}/{output_name}"
+        if kind == "config":
             if "lineage" in template_name:
                 return f"lineage/{output_name}"
             elif "contract" in template_name:
                 return f"contracts/{output_name}"
             else:
                 return f"src/main/resources/{output_name}"
-        elif output_name.endswith(".xml"):
-            return output_name  # pom.xml stays at root
-        elif output_name.endswith(".mod"):
-            return output_name  # go.mod stays at root
-        else:
-            return output_name
+        # Everything else (pom.xml, go.mod, ...) stays at the repo root
+        return output_name
 
     def _interpolate(self, template: str, variables: dict[str, Any]) -> str:
         """Perform variable interpolation on a template string."""
-        def replace_var(match):
-            var_name = match.group(1)
-            value = variables.get(var_name, f"${{{var_name}}}")
-            if isinstance(value, list):
-                return ", ".join(str(v) for v in value)
-            return str(value)
+        return self._format(compile_template(template), variables)
+
+    @staticmethod
+    def _format(compiled: str, variables: dict[str, Any]) -> str:
+        """
+        Fill a compile_template() result with variable values.
 
-        return self._variable_pattern.sub(replace_var, template)
+        Values are formatted as-is; to_dict() already joins list fields such
+        as ARCHETYPES into strings.
+        """
+        return compiled.format_map(_SafeDict(variables))
 
     def _get_builtin_template(self, template_type: str) -> str:
         """Get a built-in template by type."""
-        templates = {
-            "runbook": self._builtin_runbook_template(),
-            "lineage-spec": self._builtin_lineage_template(),
-            "contract-stub": self._builtin_contract_template(),
-            "telemetry-test-java": self._builtin_java_test_template(),
-            "telemetry-test-python": self._builtin_python_test_template(),
-            "telemetry-test-go": self._builtin_go_test_template()
-        }
-        return templates.get(template_type, "")
-
-    def _builtin_runbook_template(self) -> str:
-        """Built-in RUNBOOK.md template."""
-        return """# ${SERVICE_NAME} Runbook
-
-## Service Overview
-
-| Attribute | Value |
-|-----------|-------|
-| **Service URN** | `${SERVICE_URN}` |
-| **Owner Team** | ${OWNER_TEAM} |
-| **Namespace** | ${NAMESPACE} |
-| **Archetypes** | ${ARCHETYPES} |
-
-## Observability
-
-### Metrics
-
-| Metric | Description | Alert Threshold |
-|--------|-------------|-----------------|
-| `otel_span_count` | Count of OTel spans emitted | < 1/min = warning |
-| `kafka_consumer_lag` | Kafka consumer group lag | > 1000 = critical |
-| `error_rate` | Error rate (5xx responses) | > 5% = critical |
-
-### Traces
-
-This service emits OpenTelemetry traces for:
-- Kafka consumer processing
-- Kafka producer sends
-- HTTP/gRPC requests
-
-**Trace Attributes:**
-- `service.name`: ${SERVICE_NAME}
-- `service.namespace`: ${NAMESPACE}
-- `x-obs-dataproduct-urn`: ${SERVICE_URN}
-
-### Dashboards
-
-- [Service Dashboard](https://grafana.internal/d/${SERVICE_NAME})
-- [Kafka Consumer Lag](https://grafana.internal/d/kafka-lag?var-consumer_group=${CONSUMER_GROUP})
-
-## Common Issues
-
-### High Consumer Lag
-
-**Symptoms:** Kafka consumer lag exceeds threshold
-
-**Investigation:**
-1. Check consumer pod health: `kubectl get pods -l app=${SERVICE_NAME}`
-2. Check consumer logs: `kubectl logs -l app=${SERVICE_NAME} --tail=100`
-3. Verify topic partitions: Check Kafka UI for partition distribution
-
-**Resolution:**
-- Scale up consumers if processing is CPU-bound
-- Check for slow downstream dependencies
-- Verify no poison pill messages
-
-### Missing Traces
-
-**Symptoms:** Spans not appearing in tracing backend
-
-**Investigation:**
-1. Check OTel Collector health
-2. Verify OTEL_EXPORTER_OTLP_ENDPOINT environment variable
-3. Check for sampling configuration
-
-**Resolution:**
-- Restart OTel Collector sidecar
-- Verify network connectivity to collector
-
-## Contacts
-
-- **On-call Team:** ${OWNER_TEAM}
-- **Slack Channel:** #${SERVICE_NAME}-alerts
-- **Escalation:** Platform Team
-
----
-*Generated by Instrumentation Autopilot*
-*Last Updated: ${TIMESTAMP}*
-"""
-
-    def _builtin_lineage_template(self) -> str:
-        """Built-in lineage spec template."""
-        return """# Lineage Specification for ${SERVICE_NAME}
-# Generated by Instrumentation Autopilot
-
-apiVersion: lineage.autopilot.io/v1
-kind: LineageSpec
-metadata:
-  name: ${SERVICE_NAME}
-  namespace: ${NAMESPACE}
-  labels:
-    autopilot.io/managed: "true"
-    autopilot.io/diff-plan-id: "${DIFF_PLAN_ID}"
-
-spec:
-  service:
-    urn: "${SERVICE_URN}"
-    name: "${SERVICE_NAME}"
-    owner: "${OWNER_TEAM}"
-
-  inputs:
-    - name: input-stream
-      type: kafka-topic
-      urn: "urn:kafka:${NAMESPACE}:${INPUT_TOPIC}"
-      schema:
-        registry: schema-registry
-        subject: "${INPUT_TOPIC}-value"
-
-  outputs:
-    - name: output-stream
-      type: kafka-topic
-      urn: "urn:kafka:${NAMESPACE}:${OUTPUT_TOPIC}"
-      schema:
-        registry: schema-registry
-        subject: "${OUTPUT_TOPIC}-value"
-
-  transformations:
-    - name: enrich
-      description: "Enriches input records with additional data"
-      inputs: [input-stream]
-      outputs: [output-stream]
-      sla:
-        latencyP99: 500ms
-        throughput: 1000/s
-"""
-
-    def _builtin_contract_template(self) -> str:
-        """Built-in data contract template."""
-        return """# Data Contract for ${SERVICE_NAME}
-# Generated by Instrumentation Autopilot
-
-apiVersion: contracts.autopilot.io/v1
-kind: DataContract
-metadata:
-  name: ${SERVICE_NAME}-contract
-  namespace: ${NAMESPACE}
-  labels:
-    autopilot.io/managed: "true"
-    autopilot.io/diff-plan-id: "${DIFF_PLAN_ID}"
-
-spec:
-  owner: ${OWNER_TEAM}
-  description: "Data contract for ${SERVICE_NAME} output"
-
-  dataset:
-    urn: "urn:kafka:${NAMESPACE}:${OUTPUT_TOPIC}"
-    type: kafka-topic
-
-  schema:
-    format: avro
-    registry: schema-registry
-    subject: "${OUTPUT_TOPIC}-value"
-
-  slos:
-    freshness:
-      maxStalenessMinutes: 5
-      monitoringWindow: 1h
-
-    volume:
-      expectedDailyRecords: 100000
-      warningThresholdPercent: 20
-      criticalThresholdPercent: 50
-
-    quality:
-      nullRateThreshold: 0.01
-      duplicateRateThreshold: 0.001
-
-  notifications:
-    - channel: slack
-      target: "#${SERVICE_NAME}-alerts"
-      severity: critical
-
-    - channel: pagerduty
-      target: ${OWNER_TEAM}-oncall
-      severity: critical
-"""
-
-    def _builtin_java_test_template(self) -> str:
-        """Built-in Java telemetry test template."""
-        return """package com.company.${NAMESPACE}.${MODULE_NAME}.otel;
-
-import org.junit.jupiter.api.BeforeEach;
-import org.junit.jupiter.api.Test;
-import static org.junit.jupiter.api.Assertions.*;
-
-/**
- * Telemetry validation tests for ${SERVICE_NAME}.
- * Generated by: Instrumentation Autopilot
- * Diff Plan ID: ${DIFF_PLAN_ID}
- */
-class ${CLASS_NAME}OtelInterceptorTest {
-
-    private static final String TEST_TOPIC = "${INPUT_TOPIC}";
-    private static final String TEST_SERVICE = "${SERVICE_NAME}";
-
-    @BeforeEach
-    void setUp() {
-        // Initialize test tracer
-    }
-
-    @Test
-    void shouldCreateConsumerSpanForMessage() {
-        // Test that consumer span is created with correct attributes
-        // messaging.system = "kafka"
-        // messaging.destination = TEST_TOPIC
-        // service.name = TEST_SERVICE
-        assertTrue(true, "Span creation test");
-    }
-
-    @Test
-    void shouldExtractObservabilityHeaders() {
-        // Test that x-obs-* headers are extracted as span attributes
-        assertTrue(true, "Header extraction test");
-    }
-
-    @Test
-    void shouldPropagateTraceContext() {
-        // Test that trace context is propagated to downstream calls
-        assertTrue(true, "Context propagation test");
-    }
-}
-"""
-
-    def _builtin_python_test_template(self) -> str:
-        """Built-in Python telemetry test template."""
-        return '''"""
-Telemetry validation tests for ${SERVICE_NAME}.
-Generated by: Instrumentation Autopilot
-Diff Plan ID: ${DIFF_PLAN_ID}
-"""
-
-import pytest
-from unittest.mock import Mock
-
-TEST_TOPIC = "${INPUT_TOPIC}"
-TEST_SERVICE = "${SERVICE_NAME}"
-TEST_CONSUMER_GROUP = "${CONSUMER_GROUP}"
-
-
-class TestOtelKafkaWrapper:
-    """Test suite for OTel Kafka wrapper instrumentation."""
-
-    def test_consumer_span_created(self):
-        """Verify consumer span is created for incoming message."""
-        # Test implementation
-        assert True
-
-    def test_trace_context_extraction(self):
-        """Verify trace context is extracted from Kafka headers."""
-        # Test implementation
-        assert True
-
-    def test_correlation_headers_extraction(self):
-        """Verify x-obs-* headers are extracted as span attributes."""
-        # Test implementation
-        assert True
-
-    def test_producer_span_created(self):
-        """Verify producer span is created when sending message."""
-        # Test implementation
-        assert True
-
-
-if __name__ == "__main__":
-    pytest.main([__file__, "-v"])
-'''
-
-    def _builtin_go_test_template(self) -> str:
-        """Built-in Go telemetry test template."""
-        return """package otel
-
-import (
-	"context"
-	"testing"
-
-	"github.com/stretchr/testify/assert"
-)
-
-const (
-	testTopic         = "${INPUT_TOPIC}"
-	testService       = "${SERVICE_NAME}"
-	testConsumerGroup = "${CONSUMER_GROUP}"
-)
-
-func TestStartConsumerSpan(t *testing.T) {
-	// Test that consumer span is created with correct attributes
-	ctx := context.Background()
-	assert.NotNil(t, ctx)
+        return load_builtin_template(template_type)
+
+
+# Built-in template bodies live next to this module, one file per type
+BUILTIN_TEMPLATES_PATH = Path(__file__).resolve().parent / "builtin_templates"
+
+BUILTIN_TEMPLATE_TYPES = frozenset({
+    "runbook",
+    "lineage-spec",
+    "contract-stub",
+    "telemetry-test-java",
+    "telemetry-test-python",
+    "telemetry-test-go",
+})
+
+# Telemetry test template type by language
+TELEMETRY_TEST_TEMPLATES = {
+    "java": "telemetry-test-java",
+    "python": "telemetry-test-python",
+    "go": "telemetry-test-go",
 }
 
-func TestStartProducerSpan(t *testing.T) {
-	// Test that producer span is created with correct attributes
-	ctx := context.Background()
-	assert.NotNil(t, ctx)
-}
 
-func TestExtractContext(t *testing.T) {
-	// Test that trace context is extracted from headers
-	ctx := context.Background()
-	assert.NotNil(t, ctx)
-}
+@functools.cache
+def load_builtin_template(template_type: str) -> str:
+    """
+    Load a built-in template by type, reading it from disk on first use.
 
-func TestInjectContext(t *testing.T) {
-	// Test that trace context is injected into headers
-	ctx := context.Background()
-	assert.NotNil(t, ctx)
-}
-"""
+    Only the templates a process actually renders are read and kept in memory.
+    Unknown types return an empty string.
+    """
+    if template_type not in BUILTIN_TEMPLATE_TYPES:
+        return ""
+    template_path = BUILTIN_TEMPLATES_PATH / f"{template_type}.tmpl"
+    try:
+        return template_path.read_text(encoding="utf-8")
+    except FileNotFoundError as e:
+        raise FileNotFoundError(
+            f"Built-in template '{template_type}' is missing: {template_path} "
+            "(scripts/builtin_templates/ must ship alongside template_engine.py)"
+        ) from e
 
 
 def test_template_engine():
@@ -607,18 +535,18 @@ def main():
         context = TemplateContext(**context_data)
 
         engine = TemplateEngine()
-        files = engine.render_template(args.template, context)
+        files = engine.iter_rendered(args.template, context)
 
         if args.output_dir:
             output_dir = Path(args.output_dir)
             output_dir.mkdir(parents=True, exist_ok=True)
-            for path, content in files.items():
+            for path, content in files:
                 output_path = output_dir / path
                 output_path.parent.mkdir(parents=True, exist_ok=True)
                 output_path.write_text(content)
                 print(f"Written: {output_path}")
         else:
-            for path, content in files.items():
+            for path, content in files:
                 print(f"\n--- {path} ---")
                 print(content)
 
@@ -5,18 +5,53 @@ Transforms Observability Diff Plans into Pull Requests with instrumentation code
 """
 
 import argparse
+import functools
 import json
+import logging
+import logging.handlers
 import os
+import queue
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
+try:
+    import orjson
+except ImportError:  # Optional: faster JSON encode/decode
+    orjson = None
+
 from template_engine import TemplateEngine, TemplateContext
 from github_client import GitHubClient
 from gitlab_client import GitLabClient
 
+logger = logging.getLogger(__name__)
+
+
+# Recommended OTel SDK version per language
+OTEL_VERSIONS = {
+    "java": "1.32.0",
+    "python": "1.22.0",
+    "go": "1.24.0"
+}
+
+# Telemetry test file path per language, formatted with the service name
+TEST_PATHS = {
+    "java": "src/test/java/com/company/{path}/otel/{name}OtelInterceptorTest.java",
+    "python": "tests/test_otel_{name}.py",
+    "go": "internal/observability/otel_test.go"
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def derive_namespace(repo_name: str) -> str:
+    """Derive the service namespace from a repo name (prefix before the first '-')."""
+    namespace, separator, _ = repo_name.partition("-")
+    return namespace if separator else "default"
+
 
 @dataclass
 class PRAuthorConfig:
@@ -28,6 +63,7 @@ class PRAuthorConfig:
     confidence_threshold: float = 0.7
     auto_create_pr: bool = True
     require_human_review: bool = True
+    render_workers: int = 4
 
     def __post_init__(self):
         if self.pr_labels is None:
@@ -56,6 +92,9 @@ class PRAuthorAgent:
     - Operational runbooks
     """
 
+    # Top-level fields every Diff Plan must provide, in reporting order
+    REQUIRED_FIELDS = ("repo", "archetypes", "confidence", "tech_stack", "gaps")
+
     def __init__(self, config: PRAuthorConfig = None, vcs_client: str = "github"):
         self.config = config or PRAuthorConfig()
         self.template_engine = TemplateEngine(self.config.templates_path)
@@ -96,18 +135,21 @@ class PRAuthorAgent:
                 "diff_plan_id": diff_plan.get("diff_plan_id")
             }
 
-        print(f"Processing Diff Plan for: {diff_plan['repo']}")
-        print(f"  Archetypes: {', '.join(diff_plan['archetypes'])}")
-        print(f"  Confidence: {confidence:.0%}")
-        print(f"  Gaps: {len(diff_plan.get('gaps', []))}")
+        logger.info(
+            "Processing Diff Plan for: %s\n  Archetypes: %s\n  Confidence: %.0f%%\n  Gaps: %d",
+            diff_plan["repo"],
+            ", ".join(diff_plan["archetypes"]),
+            confidence * 100,
+            len(diff_plan.get("gaps", []))
+        )
 
         # Step 3: Build template context
         context = self._build_template_context(diff_plan, repo_url)
 
         # Step 4: Generate artifacts
-        print("\nGenerating artifacts...")
+        logger.info("Generating artifacts...")
         artifacts = self._generate_artifacts(diff_plan, context)
-        print(f"  Generated {len(artifacts)} files")
+        logger.info("  Generated %d files", len(artifacts))
 
         # Step 5: Generate PR description
         pr_description = self._generate_pr_description(diff_plan, artifacts, context)
@@ -125,7 +167,7 @@ class PRAuthorAgent:
 
         # Step 6: Create branch and PR
         if self.config.auto_create_pr:
-            print("\nCreating Pull Request...")
+            logger.info("Creating Pull Request...")
             pr_result = self._create_pull_request(
                 repo_url=repo_url,
                 diff_plan=diff_plan,
@@ -140,11 +182,19 @@ class PRAuthorAgent:
             "artifacts_count": len(artifacts)
         }
 
+    def close(self):
+        """Close the VCS client and its pooled connections."""
+        self.vcs_client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
     def _validate_diff_plan(self, diff_plan: dict[str, Any]) -> None:
         """Validate the Diff Plan structure."""
-        required_fields = ["repo", "archetypes", "confidence", "tech_stack", "gaps"]
-        missing = [f for f in required_fields if f not in diff_plan]
-
+        missing = [f for f in self.REQUIRED_FIELDS if f not in diff_plan]
         if missing:
             raise ValueError(f"Invalid Diff Plan: missing fields {missing}")
 
@@ -173,7 +223,7 @@ class PRAuthorAgent:
         return TemplateContext(
             service_name=repo_name,
             service_urn=f"urn:svc:prod:{repo_name}",
-            namespace=repo_name.split("-")[0] if "-" in repo_name else "default",
+            namespace=derive_namespace(repo_name),
             input_topic=input_topic,
             output_topic=output_topic,
             owner_team=self._get_owner_team(repo_url),
@@ -194,12 +244,7 @@ class PRAuthorAgent:
 
     def _get_otel_version(self, language: str) -> str:
         """Get the recommended OTel SDK version for a language."""
-        versions = {
-            "java": "1.32.0",
-            "python": "1.22.0",
-            "go": "1.24.0"
-        }
-        return versions.get(language, "1.32.0")
+        return OTEL_VERSIONS.get(language, OTEL_VERSIONS["java"])
 
     def _generate_artifacts(
         self,
@@ -207,97 +252,98 @@ class PRAuthorAgent:
         context: TemplateContext
     ) -> list[GeneratedArtifact]:
         """Generate all artifacts based on the Diff Plan."""
-        artifacts = []
+        # Keyed by file path: a later artifact for the same path replaces the earlier one
+        artifacts: dict[str, GeneratedArtifact] = {}
+        gaps = diff_plan.get("gaps", [])
+        gap_types = {g["type"] for g in gaps}
+        # Build the template variables once and share them across all renders
+        variables = context.to_dict()
+
+        # Render each gap's template concurrently so template file reads overlap
+        template_names = [gap["template"] for gap in gaps if gap.get("template")]
+        with ThreadPoolExecutor(max_workers=self.config.render_workers) as executor:
+            renders = [
+                (template_name, executor.submit(
+                    self.template_engine.render_template,
+                    template_name=template_name,
+                    context=context,
+                    variables=variables
+                ))
+                for template_name in template_names
+            ]
 
         # Process each gap
-        for gap in diff_plan.get("gaps", []):
-            template_name = gap.get("template", "")
-            if not template_name:
-                continue
-
+        for template_name, render in renders:
             try:
-                # Render template
-                rendered_files = self.template_engine.render_template(
-                    template_name=template_name,
-                    context=context
-                )
+                rendered_files = render.result()
 
                 for file_path, content in rendered_files.items():
-                    artifacts.append(GeneratedArtifact(
+                    artifacts[file_path] = GeneratedArtifact(
                         file_path=file_path,
                         content=content,
                         action="create",
                         template=template_name
-                    ))
+                    )
 
             except Exception as e:
-                print(f"  Warning: Failed to render template {template_name}: {e}")
+                logger.warning("  Warning: Failed to render template %s: %s", template_name, e)
 
         # Process patch plan
         for patch in diff_plan.get("patch_plan", []):
-            artifacts.append(GeneratedArtifact(
+            artifacts[patch["file"]] = GeneratedArtifact(
                 file_path=patch["file"],
                 content=patch.get("content", ""),
                 action=patch["action"]
-            ))
-
-        # Always generate runbook if missing
-        if not any(a.file_path == "RUNBOOK.md" for a in artifacts):
-            runbook_content = self.template_engine.render_runbook(context)
-            artifacts.append(GeneratedArtifact(
-                file_path="RUNBOOK.md",
-                content=runbook_content,
-                action="create",
-                template="runbook"
-            ))
-
-        # Generate lineage spec if missing
-        if "missing_lineage_spec" in [g["type"] for g in diff_plan.get("gaps", [])]:
-            lineage_content = self.template_engine.render_lineage_spec(context)
-            artifacts.append(GeneratedArtifact(
-                file_path=f"lineage/{context.service_name}.yaml",
-                content=lineage_content,
-                action="create",
-                template="lineage-spec"
-            ))
-
-        # Generate data contract if missing
-        if "missing_contract" in [g["type"] for g in diff_plan.get("gaps", [])]:
-            contract_content = self.template_engine.render_contract_stub(context)
-            artifacts.append(GeneratedArtifact(
-                file_path=f"contracts/{context.service_name}.yaml",
-                content=contract_content,
+            )
+
+        # Built-in documents: always a runbook if missing, plus lineage spec
+        # and data contract when the Diff Plan reports them missing
+        builtin_paths = {}
+        if "RUNBOOK.md" not in artifacts:
+            builtin_paths["runbook"] = "RUNBOOK.md"
+        if "missing_lineage_spec" in gap_types:
+            builtin_paths["lineage-spec"] = f"lineage/{context.service_name}.yaml"
+        if "missing_contract" in gap_types:
+            builtin_paths["contract-stub"] = f"contracts/{context.service_name}.yaml"
+
+        builtin_contents = self.template_engine.render_many(
+            list(builtin_paths), context, variables
+        )
+        for template_type, file_path in builtin_paths.items():
+            artifacts[file_path] = GeneratedArtifact(
+                file_path=file_path,
+                content=builtin_contents[template_type],
                 action="create",
-                template="contract-stub"
-            ))
+                template=template_type
+            )
 
         # Generate telemetry validation tests
         # Tests are generated for any instrumentation gap (missing_otel, missing_correlation)
-        instrumentation_gaps = [g for g in diff_plan.get("gaps", [])
-                                if g["type"] in ("missing_otel", "missing_correlation")]
-        if instrumentation_gaps:
-            test_content = self.template_engine.render_telemetry_test(context)
+        if gap_types & {"missing_otel", "missing_correlation"}:
+            test_content = self.template_engine.render_telemetry_test(context, variables)
             test_path = self._get_test_path(context)
-            artifacts.append(GeneratedArtifact(
+            artifacts[test_path] = GeneratedArtifact(
                 file_path=test_path,
                 content=test_content,
                 action="create",
                 template="telemetry-test"
-            ))
+            )
 
-        return artifacts
+        return list(artifacts.values())
 
     def _get_test_path(self, context: TemplateContext) -> str:
         """Determine the test file path based on language."""
         lang = context.language
         service_name = context.service_name
 
-        test_paths = {
-            "java": f"src/test/java/com/company/{service_name.replace('-', '/')}/otel/{context.service_name.replace('-', '').title()}OtelInterceptorTest.java",
-            "python": f"tests/test_otel_{service_name.replace('-', '_')}.py",
-            "go": f"internal/observability/otel_test.go"
-        }
-        return test_paths.get(lang, f"tests/test_telemetry.{lang}")
+        if lang == "java":
+            return TEST_PATHS[lang].format(
+                path=service_name.replace("-", "/"),
+                name=service_name.replace("-", "").title()
+            )
+        elif lang == "python":
+            return TEST_PATHS[lang].format(name=service_name.replace("-", "_"))
+        return TEST_PATHS.get(lang, f"tests/test_telemetry.{lang}")
 
     def _generate_pr_description(
         self,
@@ -306,21 +352,18 @@ class PRAuthorAgent:
         context: TemplateContext
     ) -> str:
         """Generate the PR description from template."""
-        changes_list = "\n".join([
-            f"- `{a.file_path}` ({a.action})"
-            for a in artifacts
-        ])
+        changes, files = [], []
+        for a in artifacts:
+            changes.append(f"- `{a.file_path}` ({a.action})")
+            files.append(f"| `{a.file_path}` | {a.action} | {a.template or 'patch'} |")
+        changes_list = "\n".join(changes)
+        files_list = "\n".join(files)
 
         gaps_list = "\n".join([
             f"- [{gap['priority']}] {gap['type']}: {gap['description']}"
             for gap in diff_plan.get("gaps", [])
         ])
 
-        files_list = "\n".join([
-            f"| `{a.file_path}` | {a.action} | {a.template or 'patch'} |"
-            for a in artifacts
-        ])
-
         return f"""## Autopilot: Observability Instrumentation
 
 This PR was generated by the Instrumentation Autopilot to add observability
@@ -373,23 +416,21 @@ Gate 1 checks will run as part of this PR's CI pipeline.
     ) -> dict[str, Any]:
         """Create the Pull Request via VCS API."""
         repo_name = diff_plan["repo"]
-        timestamp = int(datetime.now().timestamp())
+        timestamp = int(time.time())
         branch_name = f"{self.config.branch_prefix}-{repo_name}-{timestamp}"
 
-        # Create branch
-        print(f"  Creating branch: {branch_name}")
-        self.vcs_client.create_branch(
-            repo_url=repo_url,
-            branch_name=branch_name,
-            base_branch=self.config.default_branch
-        )
+        # Create branch, unless the VCS can create it as part of the commit
+        atomic_branch_commit = self.vcs_client.supports_atomic_branch_commit
+        logger.info("  Creating branch: %s", branch_name)
+        if not atomic_branch_commit:
+            self.vcs_client.create_branch(
+                repo_url=repo_url,
+                branch_name=branch_name,
+                base_branch=self.config.default_branch
+            )
 
-        # Commit files
-        files_to_commit = {
-            a.file_path: a.content
-            for a in artifacts
-        }
-        print(f"  Committing {len(files_to_commit)} files...")
+        # Commit files (artifact paths are already unique)
+        logger.info("  Committing %d files...", len(artifacts))
 
         commit_message = f"""feat(observability): Add instrumentation via Autopilot
 
@@ -400,11 +441,16 @@ Diff Plan ID: {diff_plan.get('diff_plan_id', 'N/A')}
 Confidence: {diff_plan['confidence']:.0%}
 """
 
+        commit_kwargs = {}
+        if atomic_branch_commit:
+            commit_kwargs["base_branch"] = self.config.default_branch
+
         self.vcs_client.commit_files(
             repo_url=repo_url,
             branch_name=branch_name,
-            files=files_to_commit,
-            message=commit_message
+            files=((a.file_path, a.content) for a in artifacts),
+            message=commit_message,
+            **commit_kwargs
         )
 
         # Create PR
@@ -413,7 +459,7 @@ Confidence: {diff_plan['confidence']:.0%}
 
         pr_title = f"feat(observability): Add {', '.join(diff_plan['archetypes'][:2])} instrumentation"
 
-        print(f"  Creating PR: {pr_title}")
+        logger.info("  Creating PR: %s", pr_title)
         pr_result = self.vcs_client.create_pull_request(
             repo_url=repo_url,
             title=pr_title,
@@ -423,7 +469,7 @@ Confidence: {diff_plan['confidence']:.0%}
             labels=pr_labels
         )
 
-        print(f"  PR created: {pr_result.get('url', 'N/A')}")
+        logger.info("  PR created: %s", pr_result.get("url", "N/A"))
 
         return {
             "status": "success",
@@ -437,31 +483,80 @@ Confidence: {diff_plan['confidence']:.0%}
         }
 
 
+def load_json(path: Path) -> Any:
+    """Load a JSON file, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_json(path: Path, data: Any) -> None:
+    """Write data as indented JSON, using orjson when available."""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        path.write_text(json.dumps(data, indent=2))
+
+
 def print_result(result: dict[str, Any]) -> None:
     """Print a human-readable summary of the result."""
-    print("\n" + "=" * 60)
-    print("PR AUTHOR AGENT RESULT")
-    print("=" * 60)
-
     status = result.get("status", "unknown")
-    print(f"\nStatus: {status.upper()}")
+    lines = [
+        "",
+        "=" * 60,
+        "PR AUTHOR AGENT RESULT",
+        "=" * 60,
+        "",
+        f"Status: {status.upper()}"
+    ]
 
     if status == "success":
-        print(f"PR URL: {result.get('pr_url')}")
-        print(f"PR Number: #{result.get('pr_number')}")
-        print(f"Branch: {result.get('branch')}")
-        print(f"Files Changed: {result.get('files_changed')}")
-        print(f"Archetypes: {', '.join(result.get('archetypes', []))}")
-        print(f"Gaps Addressed: {', '.join(result.get('gaps_addressed', []))}")
+        lines += [
+            f"PR URL: {result.get('pr_url')}",
+            f"PR Number: #{result.get('pr_number')}",
+            f"Branch: {result.get('branch')}",
+            f"Files Changed: {result.get('files_changed')}",
+            f"Archetypes: {', '.join(result.get('archetypes', []))}",
+            f"Gaps Addressed: {', '.join(result.get('gaps_addressed', []))}"
+        ]
     elif status == "dry_run":
-        print(f"Diff Plan ID: {result.get('diff_plan_id')}")
-        print(f"\nArtifacts that would be created:")
-        for artifact in result.get("artifacts", []):
-            print(f"  - {artifact['path']} ({artifact['action']})")
+        lines += [
+            f"Diff Plan ID: {result.get('diff_plan_id')}",
+            "",
+            "Artifacts that would be created:"
+        ]
+        lines += [
+            f"  - {artifact['path']} ({artifact['action']})"
+            for artifact in result.get("artifacts", [])
+        ]
     elif status == "skipped":
-        print(f"Reason: {result.get('reason')}")
+        lines.append(f"Reason: {result.get('reason')}")
+
+    lines += ["", "=" * 60]
+    print("\n".join(lines))
 
-    print("\n" + "=" * 60)
+
+def configure_logging() -> logging.handlers.QueueListener:
+    """
+    Send log records to stderr from a background thread.
+
+    Records are handed to a queue, so logging calls on the processing path
+    never block on terminal I/O. The caller must stop the returned listener
+    to flush pending records.
+    """
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, handler)
+
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    listener.start()
+    return listener
 
 
 def main():
@@ -502,6 +597,7 @@ def main():
     )
 
     args = parser.parse_args()
+    listener = configure_logging()
 
     try:
         # Load Diff Plan
@@ -509,8 +605,7 @@ def main():
         if not diff_plan_path.exists():
             raise ValueError(f"Diff Plan not found: {diff_plan_path}")
 
-        with open(diff_plan_path) as f:
-            diff_plan = json.load(f)
+        diff_plan = load_json(diff_plan_path)
 
         # Get repo URL
         repo_url = args.repo_url or diff_plan.get("repo_url")
@@ -519,27 +614,29 @@ def main():
 
         # Create agent
         config = PRAuthorConfig(templates_path=args.templates_path)
-        agent = PRAuthorAgent(config=config, vcs_client=args.vcs)
-
-        # Process Diff Plan
-        result = agent.process_diff_plan(
-            diff_plan=diff_plan,
-            repo_url=repo_url,
-            dry_run=args.dry_run
-        )
+        with PRAuthorAgent(config=config, vcs_client=args.vcs) as agent:
+            # Process Diff Plan
+            result = agent.process_diff_plan(
+                diff_plan=diff_plan,
+                repo_url=repo_url,
+                dry_run=args.dry_run
+            )
 
         # Output result
         if args.output:
             output_path = Path(args.output)
-            output_path.write_text(json.dumps(result, indent=2))
-            print(f"Result written to: {output_path}")
-
-        print_result(result)
+            write_json(output_path, result)
+            logger.info("Result written to: %s", output_path)
 
     except Exception as e:
-        print(f"Error: {e}", file=sys.stderr)
+        logger.error("Error: %s", e)
         sys.exit(1)
 
+    finally:
+        listener.stop()
+
+    print_result(result)
+
 
 if __name__ == "__main__":
     main()
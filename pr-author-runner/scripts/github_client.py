@@ -5,16 +5,123 @@ Handles branch creation, file commits, and Pull Request creation via GitHub API.
 """
 
 import base64
+import functools
+import importlib.util
 import os
+import random
+import re
+import threading
 import time
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from datetime import datetime
+from email.utils import parsedate_to_datetime
 from typing import Any
 from urllib.parse import urlparse
 
 import httpx
 
+try:
+    import orjson
+except ImportError:  # Optional: faster JSON encoding and decoding
+    orjson = None
 
-@dataclass
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Process-wide clients from GitHubClient.shared(), keyed by API URL and credentials
+_SHARED_CLIENTS: dict[tuple[str | None, ...], "GitHubClient"] = {}
+_SHARED_LOCK = threading.Lock()
+
+# Statuses worth retrying; other client errors fail immediately
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Upper bound for any single retry or rate-limit wait, in seconds
+MAX_RETRY_WAIT = 60
+
+# CODEOWNERS rules: a path pattern followed by its owners (comments skipped)
+_CODEOWNERS_RULE = re.compile(r"^[ \t]*[^#\s]\S*[ \t]+(.+)$", re.MULTILINE)
+_CODEOWNERS_OWNER = re.compile(r"(?<!\S)@+(\S+)")
+
+# Checked in order; the first one present wins
+CODEOWNERS_PATHS = ("CODEOWNERS", ".github/CODEOWNERS", "docs/CODEOWNERS")
+
+# Fetches every CODEOWNERS candidate in one round trip instead of three probes
+CODEOWNERS_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    root: object(expression: "HEAD:CODEOWNERS") { ... on Blob { text } }
+    github: object(expression: "HEAD:.github/CODEOWNERS") { ... on Blob { text } }
+    docs: object(expression: "HEAD:docs/CODEOWNERS") { ... on Blob { text } }
+  }
+}
+"""
+
+CREATE_COMMIT_MUTATION = """
+mutation($input: CreateCommitOnBranchInput!) {
+  createCommitOnBranch(input: $input) {
+    commit { oid url }
+  }
+}
+"""
+
+
+@functools.lru_cache(maxsize=256)
+def parse_repo_url(repo_url: str) -> tuple[str, str]:
+    """Parse owner and repo name from URL."""
+    parsed = urlparse(repo_url)
+    path_parts = parsed.path.strip("/").split("/")
+    if len(path_parts) >= 2:
+        owner = path_parts[0]
+        repo = path_parts[1].replace(".git", "")
+        return owner, repo
+    raise ValueError(f"Invalid repository URL: {repo_url}")
+
+
+class GraphQLError(RuntimeError):
+    """The GraphQL API returned errors for a query."""
+
+
+def parse_retry_after(headers: httpx.Headers) -> float | None:
+    """Parse Retry-After-ms / Retry-After (seconds or HTTP date) into seconds."""
+    retry_after_ms = headers.get("Retry-After-ms")
+    if retry_after_ms:
+        try:
+            return max(float(retry_after_ms) / 1000, 0.0)
+        except ValueError:
+            pass
+    retry_after = headers.get("Retry-After")
+    if not retry_after:
+        return None
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_codeowners(content: str) -> list[str]:
+    """Extract unique owners from CODEOWNERS content, in file order."""
+    owners = dict.fromkeys(
+        owner
+        for rule in _CODEOWNERS_RULE.findall(content)
+        for owner in _CODEOWNERS_OWNER.findall(rule)
+    )
+    return list(owners)
+
+
+def decode_json(response: httpx.Response) -> Any:
+    """Decode a JSON response body, straight from bytes with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+@dataclass(slots=True)
 class GitHubConfig:
     """Configuration for GitHub API access."""
     app_id: str | None = None
@@ -25,6 +132,8 @@ class GitHubConfig:
     timeout: int = 30
     max_retries: int = 3
     retry_delay: float = 2.0
+    # createCommitOnBranch needs GitHub.com or GitHub Enterprise Server 3.6+
+    graphql_commits: bool = True
 
     def __post_init__(self):
         # Try to load from environment if not provided
@@ -34,6 +143,8 @@ class GitHubConfig:
             self.app_id = os.environ.get("GITHUB_APP_ID")
         if not self.installation_id:
             self.installation_id = os.environ.get("GITHUB_INSTALLATION_ID")
+        if not self.private_key_path:
+            self.private_key_path = os.environ.get("GITHUB_PRIVATE_KEY_PATH")
 
 
 class GitHubClient:
@@ -48,25 +159,77 @@ class GitHubClient:
     - Pull Request creation with labels and reviewers
     """
 
+    # Branches must be created before files can be committed to them
+    supports_atomic_branch_commit = False
+
+    # Refresh installation tokens this many seconds before they expire
+    TOKEN_REFRESH_MARGIN = 600
+
+    __slots__ = (
+        "config",
+        "_client",
+        "_installation_token",
+        "_token_expires",
+        "_repo_meta",
+        "_codeowners",
+        "_rate_reset",
+        "_closed",
+    )
+
+    @classmethod
+    def shared(cls, config: GitHubConfig = None) -> "GitHubClient":
+        """
+        Return the process-wide client for these credentials.
+
+        Reusing one client keeps its connection pool and TLS sessions warm
+        across repositories. A shared client that was closed is replaced.
+        """
+        config = config or GitHubConfig()
+        key = (
+            config.api_url,
+            config.access_token,
+            config.app_id,
+            config.installation_id,
+            config.private_key_path,
+        )
+        with _SHARED_LOCK:
+            client = _SHARED_CLIENTS.get(key)
+            if client is None or client._closed.is_set():
+                client = _SHARED_CLIENTS[key] = cls(config)
+            return client
+
     def __init__(self, config: GitHubConfig = None):
         self.config = config or GitHubConfig()
+        self._installation_token: str | None = None
+        self._token_expires: float = 0
+        self._repo_meta: dict[str, dict[str, Any]] = {}
+        self._codeowners: dict[str, list[str]] = {}
+        # Epoch reset time per rate-limit resource ("core", "graphql", ...)
+        # once that budget is nearly spent
+        self._rate_reset: dict[str, float] = {}
+        # Set by close() to cut short any retry wait in progress
+        self._closed = threading.Event()
+        # One pooled client for all calls; the transport re-dials failed connects
         self._client = httpx.Client(
-            timeout=self.config.timeout,
+            transport=httpx.HTTPTransport(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_keepalive_connections=32,
+                    max_connections=64,
+                    keepalive_expiry=90
+                ),
+                retries=self.config.max_retries
+            ),
+            timeout=httpx.Timeout(self.config.timeout, connect=5, pool=5),
             headers=self._build_headers()
         )
-        self._installation_token: str | None = None
-        self._token_expires: float = 0
 
     def _build_headers(self) -> dict[str, str]:
-        """Build request headers."""
-        headers = {
+        """Build request headers (Authorization is added per request)."""
+        return {
             "Accept": "application/vnd.github+json",
             "X-GitHub-Api-Version": "2022-11-28"
         }
-        token = self._get_auth_token()
-        if token:
-            headers["Authorization"] = f"Bearer {token}"
-        return headers
 
     def _get_auth_token(self) -> str | None:
         """Get the authentication token."""
@@ -78,19 +241,39 @@ class GitHubClient:
         if self._installation_token and time.time() < self._token_expires:
             return self._installation_token
 
-        # Generate new installation token (would require JWT signing)
-        # For now, fall back to PAT or None
+        if self.config.app_id and self.config.installation_id and self.config.private_key_path:
+            return self._create_installation_token()
+
         return None
 
+    def _create_installation_token(self) -> str:
+        """Mint a GitHub App installation token and cache it until shortly before expiry."""
+        import jwt  # PyJWT, only needed for GitHub App authentication
+
+        with open(self.config.private_key_path) as f:
+            private_key = f.read()
+
+        now = int(time.time())
+        app_jwt = jwt.encode(
+            {"iat": now - 60, "exp": now + 540, "iss": self.config.app_id},
+            private_key,
+            algorithm="RS256"
+        )
+        response = self._client.post(
+            f"{self.config.api_url}/app/installations/{self.config.installation_id}/access_tokens",
+            headers={"Authorization": f"Bearer {app_jwt}"}
+        )
+        response.raise_for_status()
+        token_data = decode_json(response)
+
+        expires_at = datetime.fromisoformat(token_data["expires_at"]).timestamp()
+        self._installation_token = token_data["token"]
+        self._token_expires = expires_at - self.TOKEN_REFRESH_MARGIN
+        return self._installation_token
+
     def _parse_repo_url(self, repo_url: str) -> tuple[str, str]:
-        """Parse owner and repo name from URL."""
-        parsed = urlparse(repo_url)
-        path_parts = parsed.path.strip("/").split("/")
-        if len(path_parts) >= 2:
-            owner = path_parts[0]
-            repo = path_parts[1].replace(".git", "")
-            return owner, repo
-        raise ValueError(f"Invalid repository URL: {repo_url}")
+        """Parse owner and repo name from URL (memoized across clients)."""
+        return parse_repo_url(repo_url)
 
     def _request(
         self,
@@ -99,46 +282,156 @@ class GitHubClient:
         **kwargs
     ) -> httpx.Response:
         """Make an API request with retry logic."""
-        url = f"{self.config.api_url}{endpoint}"
+        url = endpoint if "://" in endpoint else f"{self.config.api_url}{endpoint}"
+
+        # Commit payloads carry whole files; orjson encodes them much faster
+        if orjson is not None and "json" in kwargs:
+            kwargs["content"] = orjson.dumps(kwargs.pop("json"))
+            kwargs["headers"] = {
+                **kwargs.get("headers", {}),
+                "Content-Type": "application/json"
+            }
 
+        # REST and GraphQL calls draw on separate rate-limit budgets
+        resource = "graphql" if url.endswith("/graphql") else "core"
+        last_attempt = self.config.max_retries - 1
         for attempt in range(self.config.max_retries):
+            # Budget nearly spent: wait for the reset rather than hit a 403
+            wait_time = self._rate_reset.get(resource, 0) - time.time()
+            if wait_time > 0:
+                print(f"Rate limit nearly exhausted, waiting {wait_time:.0f}s...")
+                self._sleep(min(wait_time, MAX_RETRY_WAIT))
+
+            token = self._get_auth_token()
+            if token:
+                kwargs["headers"] = {
+                    **kwargs.get("headers", {}),
+                    "Authorization": f"Bearer {token}"
+                }
             try:
                 response = self._client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                # The transport already re-dials failed connects. Other errors
+                # can arrive after the server acted, so only retry idempotent GETs.
+                if (
+                    attempt == last_attempt
+                    or method.upper() != "GET"
+                    or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                ):
+                    raise
+                delay = self._backoff(attempt)
+                print(f"Request failed ({type(e).__name__}), retrying in {delay:.1f}s...")
+                self._sleep(delay)
+                continue
 
-                # Handle rate limiting
-                if response.status_code == 403:
-                    remaining = response.headers.get("X-RateLimit-Remaining", "0")
-                    if remaining == "0":
-                        reset_time = int(response.headers.get("X-RateLimit-Reset", 0))
-                        wait_time = max(reset_time - time.time(), 1)
-                        print(f"Rate limited, waiting {wait_time:.0f}s...")
-                        time.sleep(min(wait_time, 60))
-                        continue
+            if response.is_success:
+                self._track_rate_limit(response, resource)
+                return response
 
+            # Installation token revoked or expired early: mint a new one
+            if response.status_code == 401 and self._installation_token:
+                self._installation_token = None
+                if attempt < last_attempt:
+                    continue
                 response.raise_for_status()
-                return response
 
-            except httpx.HTTPStatusError as e:
-                if attempt < self.config.max_retries - 1:
-                    delay = self.config.retry_delay * (2 ** attempt)
-                    print(f"Request failed, retrying in {delay}s...")
-                    time.sleep(delay)
-                else:
-                    raise
+            wait_time = self._retry_wait(response, attempt)
+            if wait_time is None or attempt == last_attempt:
+                response.raise_for_status()
+            print(f"Request failed ({response.status_code}), retrying in {wait_time:.1f}s...")
+            self._sleep(min(wait_time, MAX_RETRY_WAIT))
 
         raise RuntimeError("Max retries exceeded")
 
+    def _sleep(self, seconds: float) -> None:
+        """Wait before retrying; blocks only the calling worker and ends on close()."""
+        if self._closed.wait(seconds):
+            raise RuntimeError("Client closed while waiting to retry")
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff so parallel agents don't retry in lockstep."""
+        return random.uniform(
+            0, min(MAX_RETRY_WAIT, self.config.retry_delay * (2 ** attempt))
+        )
+
+    def _track_rate_limit(self, response: httpx.Response, resource: str) -> None:
+        """Remember the reset time when a rate-limit budget is nearly spent."""
+        resource = response.headers.get("X-RateLimit-Resource", resource)
+        try:
+            remaining = int(response.headers["X-RateLimit-Remaining"])
+            reset = float(response.headers["X-RateLimit-Reset"])
+        except (KeyError, ValueError):
+            # Missing or malformed headers: nothing to track
+            self._rate_reset.pop(resource, None)
+            return
+        if remaining <= 1:
+            self._rate_reset[resource] = reset
+        else:
+            self._rate_reset.pop(resource, None)
+
+    def _retry_wait(self, response: httpx.Response, attempt: int) -> float | None:
+        """Seconds to wait before retrying, or None if the error is permanent."""
+        status = response.status_code
+        retry_after = parse_retry_after(response.headers)
+        if status == 403:
+            # Primary limit: wait until the advertised reset
+            if response.headers.get("X-RateLimit-Remaining") == "0":
+                try:
+                    reset = float(response.headers["X-RateLimit-Reset"])
+                except (KeyError, ValueError):
+                    # Missing or malformed reset: fall back to backoff
+                    if retry_after is not None:
+                        return retry_after
+                    return self._backoff(attempt)
+                return max(reset - time.time(), 1)
+            # Secondary (abuse) limits send Retry-After or only a message
+            if retry_after is not None:
+                return retry_after
+            if "rate limit" in response.text.lower():
+                return self._backoff(attempt)
+            return None
+        if status in RETRYABLE_STATUSES:
+            return retry_after if retry_after is not None else self._backoff(attempt)
+        return None
+
+    def _graphql(self, query: str, variables: dict[str, Any]) -> dict[str, Any]:
+        """Run a GraphQL query and return its data."""
+        api_url = self.config.api_url
+        # GitHub Enterprise serves REST at /api/v3 and GraphQL at /api/graphql
+        if api_url.endswith("/v3"):
+            graphql_url = api_url[:-len("v3")] + "graphql"
+        else:
+            graphql_url = f"{api_url}/graphql"
+
+        response = self._request(
+            "POST",
+            graphql_url,
+            json={"query": query, "variables": variables}
+        )
+        result = decode_json(response)
+        if result.get("errors"):
+            raise GraphQLError(f"GraphQL error: {result['errors']}")
+        return result["data"]
+
+    def get_repository(self, repo_url: str) -> dict[str, Any]:
+        """Get repository metadata, cached for the lifetime of the client."""
+        owner, repo = self._parse_repo_url(repo_url)
+        key = f"{owner}/{repo}"
+        repo_meta = self._repo_meta.get(key)
+        if repo_meta is None:
+            response = self._request("GET", f"/repos/{owner}/{repo}")
+            repo_meta = self._repo_meta[key] = decode_json(response)
+        return repo_meta
+
     def get_default_branch(self, repo_url: str) -> str:
         """Get the default branch name for a repository."""
-        owner, repo = self._parse_repo_url(repo_url)
-        response = self._request("GET", f"/repos/{owner}/{repo}")
-        return response.json()["default_branch"]
+        return self.get_repository(repo_url)["default_branch"]
 
     def get_branch_sha(self, repo_url: str, branch: str) -> str:
         """Get the SHA of a branch's HEAD commit."""
         owner, repo = self._parse_repo_url(repo_url)
         response = self._request("GET", f"/repos/{owner}/{repo}/git/ref/heads/{branch}")
-        return response.json()["object"]["sha"]
+        return decode_json(response)["object"]["sha"]
 
     def create_branch(
         self,
@@ -171,63 +464,105 @@ class GitHubClient:
                 "sha": base_sha
             }
         )
-        return response.json()
+        return decode_json(response)
 
     def commit_files(
         self,
         repo_url: str,
         branch_name: str,
-        files: dict[str, str],
+        files: Mapping[str, str] | Iterable[tuple[str, str]],
         message: str
     ) -> dict[str, Any]:
         """
-        Commit multiple files to a branch using Git tree API.
+        Commit multiple files to a branch in a single commit.
 
-        This is more efficient than individual file commits as it
-        creates a single tree with all files and a single commit.
+        Uses the GraphQL createCommitOnBranch mutation, which carries every
+        file in one request. With config.graphql_commits disabled, falls
+        back to the Git tree API (tree + commit + ref update).
 
         Args:
             repo_url: Repository URL
             branch_name: Target branch
-            files: Dictionary of file_path -> content
+            files: Dictionary of file_path -> content, or (file_path, content) pairs
             message: Commit message
 
         Returns:
             Created commit object
         """
+        if isinstance(files, Mapping):
+            files = files.items()
+
+        if self.config.graphql_commits:
+            return self._commit_files_graphql(repo_url, branch_name, files, message)
+        return self._commit_files_rest(repo_url, branch_name, files, message)
+
+    def _commit_files_graphql(
+        self,
+        repo_url: str,
+        branch_name: str,
+        files: Iterable[tuple[str, str]],
+        message: str
+    ) -> dict[str, Any]:
+        """Commit files with the GraphQL createCommitOnBranch mutation."""
         owner, repo = self._parse_repo_url(repo_url)
+        headline, _, body = message.partition("\n")
+
+        data = self._graphql(CREATE_COMMIT_MUTATION, {
+            "input": {
+                "branch": {
+                    "repositoryNameWithOwner": f"{owner}/{repo}",
+                    "branchName": branch_name
+                },
+                "message": {"headline": headline, "body": body.strip()},
+                "expectedHeadOid": self.get_branch_sha(repo_url, branch_name),
+                "fileChanges": {
+                    "additions": [
+                        {
+                            "path": file_path,
+                            "contents": base64.b64encode(content.encode()).decode()
+                        }
+                        for file_path, content in files
+                    ]
+                }
+            }
+        })
+        commit = data["createCommitOnBranch"]["commit"]
+        return {"sha": commit["oid"], "html_url": commit["url"]}
+
+    def _commit_files_rest(
+        self,
+        repo_url: str,
+        branch_name: str,
+        files: Iterable[tuple[str, str]],
+        message: str
+    ) -> dict[str, Any]:
+        """
+        Commit files using the Git tree API.
 
-        # Get current branch HEAD
-        current_sha = self.get_branch_sha(repo_url, branch_name)
+        File contents are sent inline with the tree, so GitHub creates the
+        blobs without a separate request per file.
+        """
+        owner, repo = self._parse_repo_url(repo_url)
 
-        # Get current tree
-        commit_response = self._request(
+        # Branch HEAD and its tree in one call (git/ref lacks the tree SHA)
+        head_response = self._request(
             "GET",
-            f"/repos/{owner}/{repo}/git/commits/{current_sha}"
+            f"/repos/{owner}/{repo}/commits/{branch_name}"
         )
-        base_tree_sha = commit_response.json()["tree"]["sha"]
-
-        # Create blobs for each file
-        tree_items = []
-        for file_path, content in files.items():
-            blob_response = self._request(
-                "POST",
-                f"/repos/{owner}/{repo}/git/blobs",
-                json={
-                    "content": base64.b64encode(content.encode()).decode(),
-                    "encoding": "base64"
-                }
-            )
-            blob_sha = blob_response.json()["sha"]
+        head = decode_json(head_response)
+        current_sha = head["sha"]
+        base_tree_sha = head["commit"]["tree"]["sha"]
 
-            tree_items.append({
+        # Create new tree, with blobs created from the inline file contents
+        tree_items = [
+            {
                 "path": file_path,
                 "mode": "100644",
                 "type": "blob",
-                "sha": blob_sha
-            })
-
-        # Create new tree
+                "content": content
+            }
+            for file_path, content in files
+        ]
         tree_response = self._request(
             "POST",
             f"/repos/{owner}/{repo}/git/trees",
@@ -236,7 +571,7 @@ class GitHubClient:
                 "tree": tree_items
             }
         )
-        new_tree_sha = tree_response.json()["sha"]
+        new_tree_sha = decode_json(tree_response)["sha"]
 
         # Create commit
         commit_response = self._request(
@@ -248,16 +583,16 @@ class GitHubClient:
                 "parents": [current_sha]
             }
         )
-        new_commit_sha = commit_response.json()["sha"]
+        commit_data = decode_json(commit_response)
 
         # Update branch reference
         self._request(
             "PATCH",
             f"/repos/{owner}/{repo}/git/refs/heads/{branch_name}",
-            json={"sha": new_commit_sha}
+            json={"sha": commit_data["sha"]}
         )
 
-        return commit_response.json()
+        return commit_data
 
     def create_pull_request(
         self,
@@ -300,24 +635,33 @@ class GitHubClient:
                 "draft": draft
             }
         )
-        pr_data = pr_response.json()
+        pr_data = decode_json(pr_response)
         pr_number = pr_data["number"]
 
-        # Add labels
+        # Labels and reviewers are independent, so send them concurrently
+        follow_ups = []
         if labels:
-            self._request(
-                "POST",
+            follow_ups.append((
                 f"/repos/{owner}/{repo}/issues/{pr_number}/labels",
-                json={"labels": labels}
-            )
-
-        # Request reviewers
+                {"labels": labels}
+            ))
         if reviewers:
-            self._request(
-                "POST",
+            follow_ups.append((
                 f"/repos/{owner}/{repo}/pulls/{pr_number}/requested_reviewers",
-                json={"reviewers": reviewers}
-            )
+                {"reviewers": reviewers}
+            ))
+
+        if len(follow_ups) > 1:
+            with ThreadPoolExecutor(max_workers=len(follow_ups)) as executor:
+                futures = [
+                    executor.submit(self._request, "POST", endpoint, json=payload)
+                    for endpoint, payload in follow_ups
+                ]
+                for future in futures:
+                    future.result()
+        else:
+            for endpoint, payload in follow_ups:
+                self._request("POST", endpoint, json=payload)
 
         return {
             "number": pr_number,
@@ -329,40 +673,48 @@ class GitHubClient:
 
     def get_codeowners(self, repo_url: str) -> list[str]:
         """Get reviewers from CODEOWNERS file."""
-        owner, repo = self._parse_repo_url(repo_url)
+        # CODEOWNERS rarely changes within a run; also skips re-probing misses
+        if repo_url in self._codeowners:
+            return list(self._codeowners[repo_url])
 
-        # Try common CODEOWNERS locations
-        codeowners_paths = [
-            "CODEOWNERS",
-            ".github/CODEOWNERS",
-            "docs/CODEOWNERS"
-        ]
+        try:
+            content = self._fetch_codeowners_graphql(repo_url)
+        except (httpx.HTTPStatusError, GraphQLError):
+            content = self._fetch_codeowners_rest(repo_url)
+
+        owners = parse_codeowners(content) if content else []
+        self._codeowners[repo_url] = owners
+        return list(owners)
+
+    def _fetch_codeowners_graphql(self, repo_url: str) -> str | None:
+        """Fetch the first CODEOWNERS file present with a single GraphQL query."""
+        owner, repo = self._parse_repo_url(repo_url)
+        data = self._graphql(CODEOWNERS_QUERY, {"owner": owner, "name": repo})
+        repository = data["repository"]
+        if not repository:
+            return None
+        for alias in ("root", "github", "docs"):
+            blob = repository[alias]
+            if blob and blob.get("text") is not None:
+                return blob["text"]
+        return None
 
-        for path in codeowners_paths:
+    def _fetch_codeowners_rest(self, repo_url: str) -> str | None:
+        """Probe each CODEOWNERS location over REST until one exists."""
+        owner, repo = self._parse_repo_url(repo_url)
+        for path in CODEOWNERS_PATHS:
             try:
                 response = self._request(
                     "GET",
                     f"/repos/{owner}/{repo}/contents/{path}"
                 )
-                content = base64.b64decode(
-                    response.json()["content"]
+                return base64.b64decode(
+                    decode_json(response)["content"]
                 ).decode()
 
-                # Parse CODEOWNERS (simplified)
-                owners = []
-                for line in content.split("\n"):
-                    line = line.strip()
-                    if line and not line.startswith("#"):
-                        parts = line.split()
-                        for part in parts[1:]:  # Skip path pattern
-                            if part.startswith("@"):
-                                owners.append(part.lstrip("@"))
-                return owners
-
             except httpx.HTTPStatusError:
                 continue
-
-        return []
+        return None
 
     def add_comment(
         self,
@@ -377,10 +729,11 @@ class GitHubClient:
             f"/repos/{owner}/{repo}/issues/{pr_number}/comments",
             json={"body": body}
         )
-        return response.json()
+        return decode_json(response)
 
     def close(self):
-        """Close the HTTP client."""
+        """Close the HTTP client, waking any request waiting to retry."""
+        self._closed.set()
         self._client.close()
 
     def __enter__(self):